@@ -1,119 +1,312 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_from_directory
 from PIL import Image, ImageDraw, ImageFont
+from werkzeug.exceptions import NotFound
 import os
-import urllib.request
-from datetime import datetime
-import uuid
+import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import time
+import itertools
 import base64
+import json
 import io
+import zipfile
+import threading
+import gc
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
 
 app = Flask(__name__)
 
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Behind a proxy that understands X-Sendfile, let it stream /download files
+app.use_x_sendfile = os.environ.get('USE_X_SENDFILE') == '1'
+# Behind nginx: internal location that aliases GENERATED_DIR (e.g. /internal-generated/)
+X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
+
 # Configuration
 TEMPLATE_DIR = 'templates'
 GENERATED_DIR = 'generated'
 FONTS_DIR = 'fonts'
+JOBS_DIR = os.path.join(GENERATED_DIR, 'jobs')
 IMAGE_WIDTH = 1200
 IMAGE_HEIGHT = 1500
 PADDING = 100
 MAX_TEXT_WIDTH = IMAGE_WIDTH - (2 * PADDING)
+# zlib level for PNG output: 1 encodes several times faster than the default 6,
+# files are slightly larger - fine for images that are downloaded once
+PNG_COMPRESS_LEVEL = 1
+DOWNLOAD_MAX_AGE = 3600
+# Generated files are deleted after an hour; the directory never exceeds 10000 files
+GENERATED_MAX_AGE = 3600
+GENERATED_MAX_FILES = 10000
+CLEANUP_INTERVAL = 60
+# Background jobs: at most JOB_MAX_PENDING queued/running jobs per worker;
+# a job not finished after JOB_STALE_AFTER seconds is reported as failed
+# (its worker was restarted or crashed)
+JOB_MAX_PENDING = 8
+JOB_STALE_AFTER = 600
 
 # Ensure directories exist
 os.makedirs(GENERATED_DIR, exist_ok=True)
+os.makedirs(JOBS_DIR, exist_ok=True)
 os.makedirs(FONTS_DIR, exist_ok=True)
 
-# Font URLs - Google Fonts CDN (100% reliable)
-FONT_URLS = {
-    'regular': 'https://fonts.gstatic.com/s/roboto/v30/KFOmCnqEu92Fr1Mu4mxP.ttf',
-    'bold': 'https://fonts.gstatic.com/s/roboto/v30/KFOlCnqEu92Fr1MmWUlfBBc4.ttf'
-}
+# Shared HTTP session - keep-alive connections are reused across featured
+# image fetches instead of a new TCP+TLS handshake each time
+HTTP_SESSION = requests.Session()
+# No retries: a dead image host must not hold up the carousel beyond the timeout
+http_adapter = HTTPAdapter(pool_maxsize=8)
+HTTP_SESSION.mount('https://', http_adapter)
+HTTP_SESSION.mount('http://', http_adapter)
+
+# TrueType / OpenType / TrueType collection signatures
+FONT_SIGNATURES = (b'\x00\x01\x00\x00', b'true', b'OTTO', b'ttcf')
+
+def is_font_file(path):
+    """Cheap font check by file signature - ImageFont.truetype is only called in get_font"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(4) in FONT_SIGNATURES
+    except OSError:
+        return False
 
-def download_font(font_type='regular'):
-    """Download font from Google Fonts CDN - GUARANTEED TO WORK"""
-    font_path = os.path.join(FONTS_DIR, f'Roboto-{font_type.capitalize()}.ttf')
+def resolve_font_path(bold=False):
+    """Resolve font file once: repository font first, then system fonts"""
+    font_filename = "Roboto-Bold.ttf" if bold else "Roboto-Regular.ttf"
+    candidates = [
+        os.path.join(FONTS_DIR, font_filename),
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    ]
     
-    if os.path.exists(font_path):
-        return font_path
+    for path in candidates:
+        if is_font_file(path):
+            return path
     
-    try:
-        url = FONT_URLS[font_type]
-        print(f"Downloading Roboto {font_type} from Google Fonts...", flush=True)
-        urllib.request.urlretrieve(url, font_path)
-        print(f"Downloaded to {font_path}", flush=True)
-        return font_path
-    except Exception as e:
-        print(f"Failed to download font: {e}", flush=True)
-        return None
+    return None
+
+# Resolved once at startup - no filesystem probing per slide
+RESOLVED_REG_PATH = resolve_font_path(bold=False)
+RESOLVED_BOLD_PATH = resolve_font_path(bold=True)
+
+for _font_type, _font_path in (('regular', RESOLVED_REG_PATH), ('bold', RESOLVED_BOLD_PATH)):
+    if _font_path is None:
+        logger.warning("No %s TTF font found - text will use Pillow's default font", _font_type)
 
+@lru_cache(maxsize=1)
+def get_default_font():
+    """Pillow default font - cached, only used if no TTF could be loaded"""
+    return ImageFont.load_default()
+
+@lru_cache(maxsize=64)
 def get_font(size, bold=False):
-    """Get font - 100% WORKING: Use fonts directly from repository"""
-    font_filename = "Roboto-Bold.ttf" if bold else "Roboto-Regular.ttf"
-    font_path = os.path.join(FONTS_DIR, font_filename)
+    """Get font - cached per (size, bold) so each TTF is parsed only once per process"""
+    font_path = RESOLVED_BOLD_PATH if bold else RESOLVED_REG_PATH
     
-    # Use font from repository (guaranteed to exist)
-    if os.path.exists(font_path):
+    if font_path:
         try:
             font = ImageFont.truetype(font_path, size)
-            print(f"SUCCESS: Loaded {font_filename} at size {size} from repository", flush=True)
+            logger.debug("Loaded %s at size %d", os.path.basename(font_path), size)
             return font
         except Exception as e:
-            print(f"ERROR loading font from {font_path}: {e}", flush=True)
-    
-    # Fallback: Try system fonts
-    system_paths = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-    ]
-    
-    for path in system_paths:
-        if os.path.exists(path):
-            try:
-                return ImageFont.truetype(path, size)
-            except:
-                continue
+            logger.error("Loading font from %s failed: %s", font_path, e)
+            logger.warning("Using default font for size %d - text will be VERY small!", size)
     
-    # Last resort: default font (will be small)
-    print(f"WARNING: Using default font for size {size} - text will be VERY small!", flush=True)
-    return ImageFont.load_default()
+    # Last resort: default font (missing font already reported at startup)
+    return get_default_font()
+
+@lru_cache(maxsize=4096)
+def get_text_length(font, text):
+    """Advance width of text - cached, common words repeat across slides"""
+    return font.getlength(text)
 
-def wrap_text(text, font, max_width, draw):
-    """Wrap text to fit width"""
+@lru_cache(maxsize=512)
+def wrap_text(text, font, max_width):
+    """Wrap text to fit width - each word is measured once, line widths are summed
+    
+    Cached per (text, font, max_width): resubmitted carousels skip wrapping.
+    Returns a tuple so cached results cannot be modified by callers.
+    """
     if not text:
-        return []
+        return ()
     
     words = text.split()
+    
+    # Common case (short titles): the whole text fits - one measurement, no word loop
+    single_line = ' '.join(words)
+    if single_line and font.getlength(single_line) <= max_width:
+        return (single_line,)
+    
     lines = []
     current_line = []
+    current_width = 0
+    space_width = get_text_length(font, ' ')
     
     for word in words:
-        test_line = ' '.join(current_line + [word])
-        bbox = draw.textbbox((0, 0), test_line, font=font)
-        width = bbox[2] - bbox[0]
+        word_width = get_text_length(font, word)
+        test_width = current_width + space_width + word_width if current_line else word_width
         
-        if width <= max_width:
+        if test_width <= max_width:
             current_line.append(word)
+            current_width = test_width
         else:
             if current_line:
                 lines.append(' '.join(current_line))
             current_line = [word]
+            current_width = word_width
     
     if current_line:
         lines.append(' '.join(current_line))
     
-    return lines if lines else [text]
+    return tuple(lines) if lines else (text,)
 
-def draw_text_centered(draw, text, font, y, color=(0, 0, 0)):
-    """Draw centered text"""
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = bbox[2] - bbox[0]
-    x = (IMAGE_WIDTH - text_width) // 2
-    draw.text((x, y), text, font=font, fill=color)
+@lru_cache(maxsize=4096)
+def get_line_height(font, line):
+    """Ink height of a wrapped line (textbbox height) - cached per (font, line)"""
+    bbox = font.getbbox(line)
     return bbox[3] - bbox[1]
 
-def generate_slide_image(slide_data, output_path):
-    """Generate slide image - SIMPLE AND DIRECT"""
-    slide_number = slide_data.get('slideNumber', 1)
+# Optimized font sizes based on slide type - 25% smaller than before
+# Cover slides: Larger title for impact
+# Content slides: Balanced sizes for readability
+# CTA slides: Slightly larger to draw attention
+SLIDE_STYLES = {
+    'cover': {
+        'template': '1.png',
+        'main_font_size': 90,  # 120 * 0.75
+        'sub_font_size': 49,   # 65 * 0.75
+        'line_spacing': 1.25,
+        'text_spacing': 50,
+        'y_offset': 0  # Kein Offset, da Logo nach oben verschoben wurde
+    },
+    'content': {
+        'template': '2.png',
+        'main_font_size': 83,  # 110 * 0.75
+        'sub_font_size': 45,   # 60 * 0.75
+        'line_spacing': 1.3,
+        'text_spacing': 45,
+        'y_offset': 100  # Logo nach unten -> Text muss tiefer starten
+    },
+    'cta': {
+        'template': '3.png',
+        'main_font_size': 86,  # 115 * 0.75
+        'sub_font_size': 47,   # 63 * 0.75
+        'line_spacing': 1.25,
+        'text_spacing': 45,
+        'y_offset': 100  # Logo nach unten -> Text muss tiefer starten
+    }
+}
+
+@lru_cache(maxsize=256)
+def get_text_layout(style_name, main_lines, sub_lines):
+    """Vertical text layout: (start_y, main_advances, sub_advances, spacing)
+    
+    Depends only on the slide style and the wrapped lines, so repeated
+    carousels reuse it instead of measuring every line again.
+    """
+    style = SLIDE_STYLES[style_name]
+    line_spacing = style['line_spacing']
+    main_font = get_font(style['main_font_size'], bold=False)
+    sub_font = get_font(style['sub_font_size'], bold=False)
+    
+    # Calculate total height with optimized spacing (first line x line count)
+    main_height = 0
+    if main_lines:
+        main_height = get_line_height(main_font, main_lines[0]) * len(main_lines) * line_spacing
+    sub_height = 0
+    if sub_lines:
+        sub_height = get_line_height(sub_font, sub_lines[0]) * len(sub_lines) * line_spacing
+    spacing = style['text_spacing'] if main_lines and sub_lines else 0
+    total_height = main_height + spacing + sub_height
+    
+    # Center vertically + apply y_offset
+    start_y = int((IMAGE_HEIGHT - total_height) // 2) + style['y_offset']
+    
+    # Each line advances by its own height
+    main_advances = tuple(int(get_line_height(main_font, line) * line_spacing) for line in main_lines)
+    sub_advances = tuple(int(get_line_height(sub_font, line) * line_spacing) for line in sub_lines)
     
+    return start_y, main_advances, sub_advances, spacing
+
+def load_templates():
+    """Decode template PNGs once at startup - slides work on a copy"""
+    templates = {}
+    for name in sorted({style['template'] for style in SLIDE_STYLES.values()}):
+        template_path = os.path.join(TEMPLATE_DIR, name)
+        if os.path.exists(template_path):
+            with Image.open(template_path) as template:
+                template = template.convert('RGB')
+            # Layout coordinates assume IMAGE_WIDTH x IMAGE_HEIGHT - resize once here
+            if template.size != (IMAGE_WIDTH, IMAGE_HEIGHT):
+                template = template.resize((IMAGE_WIDTH, IMAGE_HEIGHT), Image.Resampling.LANCZOS)
+            templates[name] = template
+    return templates
+
+TEMPLATES = load_templates()
+
+def warm_fonts():
+    """Load every font size used by SLIDE_STYLES now instead of on the first request"""
+    for style in SLIDE_STYLES.values():
+        for size in (style['main_font_size'], style['sub_font_size']):
+            get_text_length(get_font(size, bold=False), ' ')
+
+# Synchronous on purpose: with --preload the workers fork after import and
+# inherit the loaded fonts (a warm-up thread would not survive the fork)
+warm_fonts()
+
+# Slides are independent and Pillow releases the GIL while rendering/encoding.
+# Sized per Gunicorn worker (4 workers x 2 threads by default), not from
+# cpu_count - that can be the host's core count inside a container.
+SLIDE_THREADS = int(os.environ.get('SLIDE_THREADS', 2))
+SLIDE_EXECUTOR = ThreadPoolExecutor(max_workers=SLIDE_THREADS)
+# Background carousel jobs wait on slide futures, so they need their own pool
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+# Bounds the executor's otherwise unlimited queue - released when a job ends
+job_slots = threading.BoundedSemaphore(JOB_MAX_PENDING)
+
+# Recently generated PNGs kept in memory so /download can skip the disk read.
+# Files are still written to GENERATED_DIR because the download request may
+# be served by a different Gunicorn worker.
+# Bounded by total size, not entry count - slide PNGs vary a lot in size.
+RECENT_IMAGES_MAX_BYTES = 64 * 1024 * 1024
+recent_images = OrderedDict()
+recent_images_bytes = 0
+recent_images_lock = threading.Lock()
+
+def remember_image(filename, image_data):
+    """Store PNG bytes in the in-memory LRU, evicting the oldest entries"""
+    global recent_images_bytes
+    with recent_images_lock:
+        previous = recent_images.pop(filename, None)
+        if previous is not None:
+            recent_images_bytes -= len(previous)
+        recent_images[filename] = image_data
+        recent_images_bytes += len(image_data)
+        while recent_images_bytes > RECENT_IMAGES_MAX_BYTES and len(recent_images) > 1:
+            _, evicted = recent_images.popitem(last=False)
+            recent_images_bytes -= len(evicted)
+
+def get_recent_image(filename):
+    """PNG bytes from the in-memory LRU, or None"""
+    with recent_images_lock:
+        image_data = recent_images.get(filename)
+        if image_data is not None:
+            recent_images.move_to_end(filename)
+        return image_data
+
+# Per-process counter - with time_ns and pid, ids stay unique across workers
+id_counter = itertools.count()
+
+def new_unique_id():
+    """Unique id for one carousel request (filename prefix, job id)"""
+    return f"{time.time_ns()}_{os.getpid()}_{next(id_counter)}"
+
+def get_slide_texts(slide_data):
+    """Stripped (main_text, sub_text) of a slide"""
     # Support both formats: mainText/subText AND title/subtitle
     # Check both formats explicitly to ensure we get the text
     main_text_raw = slide_data.get('mainText') or slide_data.get('title') or ''
@@ -121,34 +314,85 @@ def generate_slide_image(slide_data, output_path):
     
     main_text = str(main_text_raw).strip() if main_text_raw else ''
     sub_text = str(sub_text_raw).strip() if sub_text_raw else ''
+    return main_text, sub_text
+
+def get_style_name(slide_data):
+    """Choose slide style - decides template and text settings"""
+    if slide_data.get('slideNumber', 1) == 1:
+        return 'cover'
+    if slide_data.get('type', 'content') == 'cta':
+        return 'cta'
+    return 'content'
+
+def render_slide_png(slide_data):
+    """Render a slide in memory and return the PNG bytes"""
+    # Slides without a featured image only depend on style + text:
+    # repeated carousels are served from the cache without drawing or encoding
+    if not (slide_data.get('featuredImage') or slide_data.get('featuredImageBase64')):
+        main_text, sub_text = get_slide_texts(slide_data)
+        return render_text_slide_png(get_style_name(slide_data), main_text, sub_text)
+    with io.BytesIO() as buffer:
+        generate_slide_image(slide_data, buffer)
+        return buffer.getvalue()
+
+# Rendered slides are ~1-2 MB each, keep the cache small
+@lru_cache(maxsize=16)
+def render_text_slide_png(style_name, main_text, sub_text):
+    """PNG bytes for a text-only slide, cached per (style, main_text, sub_text)"""
+    slide_data = {
+        'slideNumber': 1 if style_name == 'cover' else 2,
+        'type': style_name,
+        'mainText': main_text,
+        'subText': sub_text,
+    }
+    with io.BytesIO() as buffer:
+        generate_slide_image(slide_data, buffer)
+        return buffer.getvalue()
+
+def render_slide_file(slide_data, output_path):
+    """Render a slide, write it to output_path and keep it in memory for /download"""
+    image_data = render_slide_png(slide_data)
+    try:
+        with open(output_path, 'wb') as f:
+            f.write(image_data)
+    except OSError:
+        # Don't leave a truncated PNG behind for other workers / nginx
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+        raise
+    remember_image(os.path.basename(output_path), image_data)
+    return image_data
+
+def generate_slide_image(slide_data, output):
+    """Generate slide image - SIMPLE AND DIRECT
+    
+    output can be a file path or a file-like object (e.g. io.BytesIO)
+    """
+    slide_number = slide_data.get('slideNumber', 1)
+    main_text, sub_text = get_slide_texts(slide_data)
     
     # NEU: Featured Image für Template 1
     featured_image_url = slide_data.get('featuredImage', '')
     featured_image_base64 = slide_data.get('featuredImageBase64', '')
     
     # Debug output for first slide
-    if slide_number == 1:
-        print(f"DEBUG Slide 1 - mainText: '{main_text}', subText: '{sub_text}'", flush=True)
-        print(f"DEBUG Slide 1 - featuredImage: '{featured_image_url}'", flush=True)
-        print(f"DEBUG Slide 1 - raw data: {slide_data}", flush=True)
-    
-    slide_type = slide_data.get('type', 'content')
-    
-    # Choose template
-    if slide_number == 1:
-        template_name = '1.png'
-    elif slide_type == 'cta':
-        template_name = '3.png'
-    else:
-        template_name = '2.png'
-    
-    template_path = os.path.join(TEMPLATE_DIR, template_name)
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"Template not found: {template_name}")
+    # (lazy %-formatting: nothing is formatted unless LOG_LEVEL=DEBUG)
+    if slide_number == 1 and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Slide 1 - mainText: %r, subText: %r", main_text, sub_text)
+        logger.debug("Slide 1 - featuredImage: %r", featured_image_url)
+        logger.debug("Slide 1 - raw data: %.500s", slide_data)
     
-    # Load image
-    img = Image.open(template_path).convert('RGB')
-    draw = ImageDraw.Draw(img)
+    style_name = get_style_name(slide_data)
+    style = SLIDE_STYLES[style_name]
+    template_name = style['template']
+    
+    # Copy preloaded template (no PNG decode or stat per slide)
+    try:
+        img = TEMPLATES[template_name].copy()
+    except KeyError:
+        raise FileNotFoundError(f"Template not found: {template_name}")
     
     # NEU: Featured Image für Template 1 OBEN einfügen
     featured_img_height = 0
@@ -160,14 +404,20 @@ def generate_slide_image(slide_data, output_path):
             
             # Von URL laden
             if featured_image_url:
-                response = requests.get(featured_image_url, timeout=10)
-                featured_img = Image.open(io.BytesIO(response.content)).convert('RGBA')
+                response = HTTP_SESSION.get(featured_image_url, timeout=10)
+                featured_img = Image.open(io.BytesIO(response.content))
             # Von Base64 laden
             elif featured_image_base64:
                 img_data = base64.b64decode(featured_image_base64)
-                featured_img = Image.open(io.BytesIO(img_data)).convert('RGBA')
+                featured_img = Image.open(io.BytesIO(img_data))
             
             if featured_img:
+                # Opake Bilder bleiben RGB; Bilder mit Transparenz wie bisher über
+                # RGBA (resize rechnet dort premultiplied, Ergebnis bleibt gleich)
+                has_alpha = (featured_img.mode in ('RGBA', 'LA', 'PA')
+                             or 'transparency' in featured_img.info)
+                featured_img = featured_img.convert('RGBA' if has_alpha else 'RGB')
+                
                 # Featured Image Größe: Breite 700px, Höhe proportional
                 target_width = 700
                 aspect_ratio = featured_img.height / featured_img.width
@@ -190,111 +440,244 @@ def generate_slide_image(slide_data, output_path):
                     fill=255
                 )
                 
-                # Maske auf das Bild anwenden
-                featured_img.putalpha(mask)
-                
                 # Position: Horizontal zentriert, OBEN (unter dem Logo)
                 x_pos = (IMAGE_WIDTH - target_width) // 2
                 y_pos = 280  # Oben, unter dem AM Logo
                 
-                # Bild einfügen mit Alpha-Kanal (für abgerundete Ecken)
-                img.paste(featured_img, (x_pos, y_pos), featured_img)
+                # Bild einfügen, Maske sorgt für abgerundete Ecken
+                if has_alpha:
+                    featured_img.putalpha(mask)
+                    img.paste(featured_img, (x_pos, y_pos), featured_img)
+                else:
+                    img.paste(featured_img, (x_pos, y_pos), mask)
                 featured_img_height = target_height
                 has_featured_image = True
-                print(f"Featured image added at ({x_pos}, {y_pos}), size: {target_width}x{target_height}, rounded corners: {radius}px", flush=True)
+                logger.debug("Featured image added at (%d, %d), size: %dx%d, rounded corners: %dpx",
+                             x_pos, y_pos, target_width, target_height, radius)
         
         except Exception as e:
-            print(f"ERROR: Failed to load featured image: {e}", flush=True)
-    
-    # Optimized font sizes based on slide type - 25% smaller than before
-    # Cover slides: Larger title for impact
-    # Content slides: Balanced sizes for readability
-    # CTA slides: Slightly larger to draw attention
-    if slide_number == 1:  # Cover slide
-        main_font_size = 90  # 120 * 0.75
-        sub_font_size = 49   # 65 * 0.75
-        line_spacing = 1.25
-        text_spacing = 50
-        y_offset = 0  # Kein Offset, da Logo nach oben verschoben wurde
-    elif slide_type == 'cta':  # CTA slide
-        main_font_size = 86   # 115 * 0.75
-        sub_font_size = 47    # 63 * 0.75
-        line_spacing = 1.25
-        text_spacing = 45
-        y_offset = 100  # Logo nach unten -> Text muss tiefer starten
-    else:  # Content slides
-        main_font_size = 83   # 110 * 0.75
-        sub_font_size = 45    # 60 * 0.75
-        line_spacing = 1.3
-        text_spacing = 45
-        y_offset = 100  # Logo nach unten -> Text muss tiefer starten
-    
-    main_font = get_font(main_font_size, bold=False)
-    sub_font = get_font(sub_font_size, bold=False)
+            logger.error("Failed to load featured image: %s", e)
+    
+    if not main_text and not sub_text:
+        # No text - save template (+ featured image) without any font/layout work
+        img.save(output, 'PNG', compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+        return output
+    
+    main_font = get_font(style['main_font_size'], bold=False)
+    sub_font = get_font(style['sub_font_size'], bold=False)
     
     # Wrap text
-    main_lines = []
-    sub_lines = []
+    main_lines = ()
+    sub_lines = ()
     
     if main_text:
-        main_lines = wrap_text(main_text, main_font, MAX_TEXT_WIDTH, draw)
+        main_lines = wrap_text(main_text, main_font, MAX_TEXT_WIDTH)
     
     if sub_text:
-        sub_lines = wrap_text(sub_text, sub_font, MAX_TEXT_WIDTH, draw)
+        sub_lines = wrap_text(sub_text, sub_font, MAX_TEXT_WIDTH)
     
-    # Calculate position
-    total_lines = len(main_lines) + len(sub_lines)
-    
-    if total_lines == 0:
-        # No text - save empty image
-        img.save(output_path, 'PNG')
-        return output_path
-    
-    # Calculate total height with optimized spacing
-    main_height = 0
-    if main_lines:
-        bbox = draw.textbbox((0, 0), main_lines[0], font=main_font)
-        main_height = (bbox[3] - bbox[1]) * len(main_lines) * line_spacing
-    
-    sub_height = 0
-    if sub_lines:
-        bbox = draw.textbbox((0, 0), sub_lines[0], font=sub_font)
-        sub_height = (bbox[3] - bbox[1]) * len(sub_lines) * line_spacing
+    draw = ImageDraw.Draw(img)
     
-    spacing = text_spacing if main_lines and sub_lines else 0
-    total_height = main_height + spacing + sub_height
+    # Vertical layout only depends on style + wrapped lines (cached)
+    start_y, main_advances, sub_advances, spacing = get_text_layout(style_name, main_lines, sub_lines)
     
-    # Center vertically + apply y_offset
     # Für Slide 1 mit Featured Image: Text UNTER dem Bild
     if slide_number == 1 and has_featured_image:
         # Text beginnt direkt unter dem Featured Image
         start_y = 280 + featured_img_height + 60  # Image Y-Pos + Höhe + Abstand
-    else:
-        # Normale Zentrierung
-        start_y = (IMAGE_HEIGHT - total_height) // 2 + y_offset
     
     # Draw main text with optimized spacing
+    # anchor 'ma' (middle/ascender) centers each line in a single layout pass
+    center_x = IMAGE_WIDTH // 2
     current_y = start_y
-    for line in main_lines:
-        line_height = draw_text_centered(draw, line, main_font, current_y, (0, 0, 0))
-        current_y += int(line_height * line_spacing)
+    for line, advance in zip(main_lines, main_advances):
+        draw.text((center_x, current_y), line, font=main_font, fill=(0, 0, 0), anchor='ma')
+        current_y += advance
     
-    if main_lines and sub_lines:
-        current_y += spacing
+    current_y += spacing
     
     # Draw sub text with optimized spacing
-    for line in sub_lines:
-        line_height = draw_text_centered(draw, line, sub_font, current_y, (60, 60, 60))
-        current_y += int(line_height * line_spacing)
+    for line, advance in zip(sub_lines, sub_advances):
+        draw.text((center_x, current_y), line, font=sub_font, fill=(60, 60, 60), anchor='ma')
+        current_y += advance
     
     # Save
-    img.save(output_path, 'PNG')
-    return output_path
+    img.save(output, 'PNG', compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+    return output
+
+def new_slide_debug(idx, slide):
+    """Debug entry with the raw and processed text fields of one slide"""
+    return {
+        'index': idx,
+        'slideNumber': slide.get('slideNumber', idx),
+        'raw_data': {
+            'mainText': repr(slide.get('mainText', '')),
+            'subText': repr(slide.get('subText', '')),
+            'title': repr(slide.get('title', '')),
+            'subtitle': repr(slide.get('subtitle', '')),
+            'type': slide.get('type', 'content')
+        },
+        'processed': {
+            'mainText': repr(slide.get('mainText') or slide.get('title', '')),
+            'subText': repr(slide.get('subText') or slide.get('subtitle', ''))
+        }
+    }
+
+def with_debug(payload, debug_info):
+    """Add the debug list to a response payload - only if ?debug=1 was given"""
+    if debug_info is not None:
+        payload['debug'] = debug_info
+    return payload
+
+def generate_all_slides(slides, base_url, debug_info=None):
+    """Render all slides to GENERATED_DIR, return the image list for the response
+    
+    Per-slide debug entries are appended to debug_info unless it is None.
+    """
+    generated_images = []
+    prefix = f"image_{new_unique_id()}"
+    
+    # Render all slides in parallel - results are collected in order below
+    filenames = [f"{prefix}_{idx}.png" for idx in range(1, len(slides) + 1)]
+    futures = [
+        SLIDE_EXECUTOR.submit(render_slide_file, slide, os.path.join(GENERATED_DIR, filename))
+        for slide, filename in zip(slides, filenames)
+    ]
+    
+    for idx, slide in enumerate(slides, 1):
+        filename = filenames[idx - 1]
+        
+        # Wait for the slide; details of a failure are only in the debug info
+        # (a failed write raises inside render_slide_file, no need to stat the file)
+        error = futures[idx - 1].exception()
+        if error is not None:
+            logger.error("Slide %d (%s) failed: %s", idx, filename, error)
+        
+        if debug_info is not None:
+            slide_debug = new_slide_debug(idx, slide)
+            if error is None:
+                slide_debug['status'] = 'success'
+                slide_debug['file_size'] = len(futures[idx - 1].result())
+                slide_debug['file_path'] = os.path.abspath(os.path.join(GENERATED_DIR, filename))
+            else:
+                slide_debug['status'] = 'error'
+                slide_debug['error'] = str(error)
+            debug_info.append(slide_debug)
+        
+        generated_images.append({
+            'slideNumber': slide.get('slideNumber', idx),
+            'url': f'{base_url}/download/{filename}',
+            'filename': filename
+        })
+    
+    return generated_images
+
+class ZipChunkWriter:
+    """Write-only sink for zipfile - keeps the written bytes until they are sent"""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def take(self):
+        """Bytes written since the last call"""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def iter_carousel_zip(prefix, futures):
+    """Stream a ZIP of the rendered slides, one slide at a time
+    
+    PNGs are stored, not deflated again. Failed slides are left out and
+    listed in errors.txt - the response has already started by then.
+    """
+    sink = ZipChunkWriter()
+    errors = []
+    # sink has no tell/seek: zipfile writes data descriptors, no seeking back
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for idx in range(1, len(futures) + 1):
+            filename = f"{prefix}_{idx}.png"
+            future = futures.pop(0)
+            try:
+                image_data = future.result()
+            except Exception as e:
+                logger.error("Slide %d (%s) failed: %s", idx, filename, e)
+                errors.append(f"{filename}: {e}")
+                continue
+            zf.writestr(filename, image_data)
+            yield sink.take()
+        if errors:
+            zf.writestr('errors.txt', '\n'.join(errors) + '\n')
+    yield sink.take()
+
+def write_job_state(job_id, state):
+    """Store job state as JSON on disk - visible to every Gunicorn worker"""
+    job_path = os.path.join(JOBS_DIR, f'{job_id}.json')
+    temp_path = f'{job_path}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(dict(state, updated_at=time.time()), f)
+    os.replace(temp_path, job_path)
+
+def read_job_state(job_id):
+    """Job state dict, or None for an unknown job
+    
+    A queued/started job whose state is older than JOB_STALE_AFTER is
+    reported as failed - the worker running it is gone.
+    """
+    job_path = os.path.join(JOBS_DIR, f'{os.path.basename(job_id)}.json')
+    try:
+        with open(job_path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    
+    if (state.get('status') in ('queued', 'started')
+            and time.time() - state.get('updated_at', 0) > JOB_STALE_AFTER):
+        state.update(status='failed', success=False,
+                     error='Job did not finish in time (worker restarted?)')
+    return state
+
+def run_carousel_job(job_id, slides, base_url, debug=False):
+    """Background job for /generate-carousel?async=1"""
+    debug_info = [] if debug else None
+    
+    try:
+        write_job_state(job_id, {'job_id': job_id, 'status': 'started'})
+        generated_images = generate_all_slides(slides, base_url, debug_info)
+        write_job_state(job_id, with_debug({
+            'job_id': job_id,
+            'status': 'finished',
+            'success': True,
+            'images': generated_images,
+            'count': len(generated_images)
+        }, debug_info))
+    except Exception as e:
+        write_job_state(job_id, with_debug({
+            'job_id': job_id,
+            'status': 'failed',
+            'success': False,
+            'error': str(e)
+        }, debug_info))
+    finally:
+        job_slots.release()
 
 @app.route('/generate-carousel', methods=['POST'])
 def generate_carousel():
-    """Generate carousel images"""
-    debug_info = []
+    """Generate carousel images
+    
+    With ?async=1 the slides are rendered in the background and the response
+    is 202 with a job URL to poll instead of the images.
+    With ?format=zip all slides are returned in one ZIP download.
+    Per-slide debug info is only included with ?debug=1.
+    """
+    debug = request.args.get('debug') == '1'
+    debug_info = [] if debug else None
     
     try:
         data = request.get_json()
@@ -302,78 +685,62 @@ def generate_carousel():
             return jsonify({'error': 'Invalid request'}), 400
         
         slides = data['slides']
-        generated_images = []
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        request_id = str(uuid.uuid4())[:8]
+        base_url = request.url_root.rstrip('/')
         
-        for idx, slide in enumerate(slides, 1):
-            slide_debug = {
-                'index': idx,
-                'slideNumber': slide.get('slideNumber', idx),
-                'raw_data': {
-                    'mainText': repr(slide.get('mainText', '')),
-                    'subText': repr(slide.get('subText', '')),
-                    'title': repr(slide.get('title', '')),
-                    'subtitle': repr(slide.get('subtitle', '')),
-                    'type': slide.get('type', 'content')
-                },
-                'processed': {
-                    'mainText': repr(slide.get('mainText') or slide.get('title', '')),
-                    'subText': repr(slide.get('subText') or slide.get('subtitle', ''))
-                }
-            }
-            
-            filename = f"image_{timestamp}_{request_id}_{idx}.png"
-            output_path = os.path.join(GENERATED_DIR, filename)
-            
-            # Generate and capture debug info
+        if request.args.get('async') == '1':
+            if not job_slots.acquire(blocking=False):
+                return jsonify({'error': 'Too many pending jobs, try again later'}), 503
+            job_id = new_unique_id()
             try:
-                generate_slide_image(slide, output_path)
-                slide_debug['status'] = 'success'
-                
-                # Check if file was created
-                abs_path = os.path.abspath(output_path)
-                if os.path.exists(abs_path):
-                    slide_debug['file_size'] = os.path.getsize(abs_path)
-                    slide_debug['file_path'] = abs_path
-                else:
-                    slide_debug['status'] = 'error'
-                    slide_debug['error'] = f'File not found at {abs_path}'
-                    slide_debug['generated_dir'] = os.path.abspath(GENERATED_DIR)
-                    slide_debug['dir_exists'] = os.path.exists(GENERATED_DIR)
-                    if os.path.exists(GENERATED_DIR):
-                        slide_debug['dir_contents'] = os.listdir(GENERATED_DIR)
-            except Exception as e:
-                slide_debug['status'] = 'error'
-                slide_debug['error'] = str(e)
-            
-            debug_info.append(slide_debug)
-            
-            base_url = request.url_root.rstrip('/')
-            generated_images.append({
-                'slideNumber': slide.get('slideNumber', idx),
-                'url': f'{base_url}/download/{filename}',
-                'filename': filename
-            })
+                write_job_state(job_id, {'job_id': job_id, 'status': 'queued'})
+                JOB_EXECUTOR.submit(run_carousel_job, job_id, slides, base_url, debug)
+            except Exception:
+                job_slots.release()
+                raise
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'{base_url}/jobs/{job_id}'
+            }), 202
+        
+        # One response instead of one /download round trip per slide
+        if request.args.get('format') == 'zip':
+            prefix = f"image_{new_unique_id()}"
+            futures = [SLIDE_EXECUTOR.submit(render_slide_png, slide) for slide in slides]
+            response = Response(iter_carousel_zip(prefix, futures), mimetype='application/zip')
+            response.headers['Content-Disposition'] = f'attachment; filename={prefix}.zip'
+            return response
         
-        return jsonify({
+        generated_images = generate_all_slides(slides, base_url, debug_info)
+        
+        return jsonify(with_debug({
             'success': True,
             'images': generated_images,
-            'count': len(generated_images),
-            'debug': debug_info
-        })
+            'count': len(generated_images)
+        }, debug_info))
     
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'debug': debug_info
-        }), 500
+        return jsonify(with_debug({
+            'error': str(e)
+        }, debug_info)), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status of a background carousel job (images included once finished)"""
+    state = read_job_state(job_id)
+    if state is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(state)
 
 # ============= NEUER BASE64 ENDPOINT - NICHTS GEÄNDERT AM ALTEN CODE =============
 @app.route('/generate-carousel-base64', methods=['POST'])
 def generate_carousel_base64():
-    """Generate carousel images and return as base64 - for n8n network bypass"""
-    debug_info = []
+    """Generate carousel images and return as base64 - for n8n network bypass
+    
+    Per-slide debug info is only included with ?debug=1.
+    """
+    debug_info = [] if request.args.get('debug') == '1' else None
     
     try:
         data = request.get_json()
@@ -382,73 +749,53 @@ def generate_carousel_base64():
         
         slides = data['slides']
         generated_images = []
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        request_id = str(uuid.uuid4())[:8]
+        prefix = f"image_{new_unique_id()}"
+        
+        # Render all slides in parallel - results are collected in order below
+        filenames = [f"{prefix}_{idx}.png" for idx in range(1, len(slides) + 1)]
+        futures = [SLIDE_EXECUTOR.submit(render_slide_png, slide) for slide in slides]
         
         for idx, slide in enumerate(slides, 1):
-            slide_debug = {
-                'index': idx,
-                'slideNumber': slide.get('slideNumber', idx),
-                'raw_data': {
-                    'mainText': repr(slide.get('mainText', '')),
-                    'subText': repr(slide.get('subText', '')),
-                    'title': repr(slide.get('title', '')),
-                    'subtitle': repr(slide.get('subtitle', '')),
-                    'type': slide.get('type', 'content')
-                },
-                'processed': {
-                    'mainText': repr(slide.get('mainText') or slide.get('title', '')),
-                    'subText': repr(slide.get('subText') or slide.get('subtitle', ''))
-                }
-            }
+            filename = filenames[idx - 1]
             
-            filename = f"image_{timestamp}_{request_id}_{idx}.png"
-            output_path = os.path.join(GENERATED_DIR, filename)
-            
-            # Generate image
+            # Generate image (rendered in memory, no disk round-trip)
+            # Failed slides are left out of the images list
             try:
-                generate_slide_image(slide, output_path)
-                slide_debug['status'] = 'success'
-                
-                # Read and encode as base64
-                abs_path = os.path.abspath(output_path)
-                if os.path.exists(abs_path):
-                    with open(abs_path, 'rb') as f:
-                        image_data = f.read()
-                        base64_data = base64.b64encode(image_data).decode('utf-8')
-                    
-                    slide_debug['file_size'] = os.path.getsize(abs_path)
-                    slide_debug['file_path'] = abs_path
-                    slide_debug['base64_length'] = len(base64_data)
-                    
-                    generated_images.append({
-                        'slideNumber': slide.get('slideNumber', idx),
-                        'filename': filename,
-                        'base64': base64_data
-                    })
-                else:
+                image_data = futures[idx - 1].result()
+            except Exception as e:
+                logger.error("Slide %d (%s) failed: %s", idx, filename, e)
+                if debug_info is not None:
+                    slide_debug = new_slide_debug(idx, slide)
                     slide_debug['status'] = 'error'
-                    slide_debug['error'] = f'File not found at {abs_path}'
+                    slide_debug['error'] = str(e)
+                    debug_info.append(slide_debug)
+                continue
             
-            except Exception as e:
-                slide_debug['status'] = 'error'
-                slide_debug['error'] = str(e)
+            base64_data = base64.b64encode(image_data).decode('utf-8')
+            generated_images.append({
+                'slideNumber': slide.get('slideNumber', idx),
+                'filename': filename,
+                'base64': base64_data
+            })
             
-            debug_info.append(slide_debug)
+            if debug_info is not None:
+                slide_debug = new_slide_debug(idx, slide)
+                slide_debug['status'] = 'success'
+                slide_debug['file_size'] = len(image_data)
+                slide_debug['base64_length'] = len(base64_data)
+                debug_info.append(slide_debug)
         
-        return jsonify({
+        return jsonify(with_debug({
             'success': True,
             'images': generated_images,
-            'count': len(generated_images),
-            'debug': debug_info
-        })
+            'count': len(generated_images)
+        }, debug_info))
     
     except Exception as e:
-        return jsonify({
+        return jsonify(with_debug({
             'success': False,
-            'error': str(e),
-            'debug': debug_info
-        }), 500
+            'error': str(e)
+        }, debug_info)), 500
 # ============= ENDE NEUER ENDPOINT =============
 
 @app.route('/download/<filename>', methods=['GET'])
@@ -456,69 +803,171 @@ def download_image(filename):
     """Download image"""
     try:
         filename = os.path.basename(filename)
-        file_path = os.path.join(GENERATED_DIR, filename)
         
-        if not os.path.exists(file_path):
-            return jsonify({'error': 'File not found'}), 404
+        # Served from memory if this worker generated it recently.
+        # Filenames are unique and files never change, so the filename is the
+        # ETag on both paths - revalidation works whichever worker answers.
+        image_data = get_recent_image(filename)
+        if image_data is not None:
+            response = Response(image_data, mimetype='image/png')
+            response.set_etag(filename)
+            response.headers['Cache-Control'] = f'public, max-age={DOWNLOAD_MAX_AGE}'
+            return response.make_conditional(request, accept_ranges=True,
+                                             complete_length=len(image_data))
+        
+        # Behind nginx: hand the transfer to nginx (sendfile, no Python I/O)
+        if X_ACCEL_REDIRECT_PREFIX:
+            response = Response(mimetype='image/png')
+            response.headers['X-Accel-Redirect'] = f'{X_ACCEL_REDIRECT_PREFIX.rstrip("/")}/{filename}'
+            response.headers['Cache-Control'] = f'public, max-age={DOWNLOAD_MAX_AGE}'
+            return response
         
-        return send_file(file_path, mimetype='image/png')
+        # Conditional GET (ETag/Last-Modified) - generated files never change.
+        # send_from_directory raises NotFound itself, no extra stat needed
+        return send_from_directory(GENERATED_DIR, filename, mimetype='image/png',
+                                   conditional=True, etag=filename, max_age=DOWNLOAD_MAX_AGE)
+    except NotFound:
+        return jsonify({'error': 'File not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def encode_json(payload):
+    """Encode a static payload once, in the same format as jsonify()"""
+    return f"{app.json.dumps(payload, separators=(',', ':'))}\n".encode('utf-8')
+
+def static_json_response(body):
+    """Response for a pre-encoded JSON body"""
+    return Response(body, mimetype='application/json')
+
+# Static responses - encoded once at startup instead of per request
+# (templates can't change at runtime, /health lists the ones preloaded in TEMPLATES)
+HEALTH_BODY = encode_json({
+    'status': 'healthy',
+    'templates': sorted(TEMPLATES)
+})
+
+DEBUG_CONFIG_BODY = encode_json({
+    'font_sizes': {
+        name: {'main': style['main_font_size'], 'sub': style['sub_font_size']}
+        for name, style in SLIDE_STYLES.items()
+    },
+    'y_offsets': {name: style['y_offset'] for name, style in SLIDE_STYLES.items()},
+    'featured_image': {
+        'max_width': 700,
+        'max_height': 450,
+        'y_position': 280,
+        'border_radius': 30,
+        'layout': 'Image OBEN → Titel → Untertitel'
+    },
+    'image_width': IMAGE_WIDTH,
+    'image_height': IMAGE_HEIGHT,
+    'max_text_width': MAX_TEXT_WIDTH,
+    'version': '2.2.1'
+})
+
+INDEX_BODY = encode_json({
+    'service': 'LinkedIn Image Generator',
+    'version': '2.2.1',
+    'endpoints': {
+        'POST /generate-carousel': 'Generate images with URLs (?async=1 for a background job, ?format=zip for one ZIP)',
+        'POST /generate-carousel-base64': 'Generate images as base64 (for n8n)',
+        'GET /download/<filename>': 'Download image',
+        'GET /jobs/<job_id>': 'Status of a background carousel job',
+        'GET /health': 'Health check',
+        'GET /debug/config': 'Show configuration'
+    },
+    'new_features': {
+        'featured_image': 'Add featuredImage URL or featuredImageBase64 to slide 1',
+        'layout': 'Slide 1: Featured Image OBEN → Titel → Untertitel',
+        'rounded_corners': '30px border radius on featured images'
+    }
+})
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check"""
-    return jsonify({
-        'status': 'healthy',
-        'templates': os.listdir(TEMPLATE_DIR) if os.path.exists(TEMPLATE_DIR) else []
-    })
+    return static_json_response(HEALTH_BODY)
 
 @app.route('/debug/config', methods=['GET'])
 def debug_config():
     """Debug endpoint to check current font sizes and configuration"""
-    return jsonify({
-        'font_sizes': {
-            'cover': {'main': 90, 'sub': 49},
-            'content': {'main': 83, 'sub': 45},
-            'cta': {'main': 86, 'sub': 47}
-        },
-        'y_offsets': {
-            'cover': 0,
-            'content': 100,
-            'cta': 100
-        },
-        'featured_image': {
-            'max_width': 700,
-            'max_height': 450,
-            'y_position': 280,
-            'border_radius': 30,
-            'layout': 'Image OBEN → Titel → Untertitel'
-        },
-        'image_width': IMAGE_WIDTH,
-        'image_height': IMAGE_HEIGHT,
-        'max_text_width': MAX_TEXT_WIDTH,
-        'version': '2.2.1'
-    })
+    return static_json_response(DEBUG_CONFIG_BODY)
 
 @app.route('/', methods=['GET'])
 def index():
     """API info"""
-    return jsonify({
-        'service': 'LinkedIn Image Generator',
-        'version': '2.2.1',
-        'endpoints': {
-            'POST /generate-carousel': 'Generate images with URLs',
-            'POST /generate-carousel-base64': 'Generate images as base64 (for n8n)',
-            'GET /download/<filename>': 'Download image',
-            'GET /health': 'Health check',
-            'GET /debug/config': 'Show configuration'
-        },
-        'new_features': {
-            'featured_image': 'Add featuredImage URL or featuredImageBase64 to slide 1',
-            'layout': 'Slide 1: Featured Image OBEN → Titel → Untertitel',
-            'rounded_corners': '30px border radius on featured images'
-        }
-    })
+    return static_json_response(INDEX_BODY)
+
+def cleanup_generated_files():
+    """Delete generated images and job files older than GENERATED_MAX_AGE
+    
+    Also keeps at most GENERATED_MAX_FILES files, removing the oldest first.
+    """
+    now = time.time()
+    remaining = []
+    removed = 0
+    
+    for directory in (GENERATED_DIR, JOBS_DIR):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith('.'):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                    if now - mtime > GENERATED_MAX_AGE:
+                        os.unlink(entry.path)
+                        removed += 1
+                    else:
+                        remaining.append((mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+    
+    if len(remaining) > GENERATED_MAX_FILES:
+        remaining.sort()
+        for _, path in remaining[:len(remaining) - GENERATED_MAX_FILES]:
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+    
+    return removed
+
+def cleanup_loop():
+    """Janitor thread - bounds disk usage of GENERATED_DIR"""
+    while True:
+        time.sleep(CLEANUP_INTERVAL)
+        try:
+            removed = cleanup_generated_files()
+            if removed:
+                logger.info("Cleanup: removed %d old generated files", removed)
+        except Exception as e:
+            logger.error("Cleanup of %s failed: %s", GENERATED_DIR, e)
+
+# Started lazily on the first request, i.e. in each worker after the fork:
+# with --preload no thread may be running in the master when Gunicorn forks
+# (a lock held at fork time, e.g. the logging lock, would deadlock the child).
+# Several janitors are fine - files already removed by another are skipped.
+janitor_started = False
+janitor_lock = threading.Lock()
+
+@app.before_request
+def start_janitor():
+    """Start the cleanup thread once per process"""
+    global janitor_started
+    if janitor_started:
+        return
+    with janitor_lock:
+        if not janitor_started:
+            threading.Thread(target=cleanup_loop, name='generated-cleanup', daemon=True).start()
+            janitor_started = True
+
+# Only affects Python object pages: after --preload the workers share the
+# import-time objects (modules, functions, caches) copy-on-write, but every
+# cyclic GC pass writes to their headers and unshares those pages. Freezing
+# moves them out of the GC's reach. Template pixels live in Pillow's C heap,
+# which the GC never touches - they stay shared either way.
+gc.freeze()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
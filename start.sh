@@ -1,5 +1,13 @@
 #!/bin/bash
 # Railway start script
 PORT=${PORT:-5000}
-exec gunicorn app:app --bind 0.0.0.0:$PORT
-
+# Fixed default of 4 worker processes (override with WEB_CONCURRENCY) -
+# nproc can report the host's cores inside a container. Each worker
+# renders slides on its own pool of SLIDE_THREADS (default 2) threads.
+# gthread workers keep serving /download and /health from other threads
+# while a carousel renders on the slide thread pool.
+# --preload imports the app once before forking, so workers share
+# the preloaded templates copy-on-write.
+WORKERS=${WEB_CONCURRENCY:-4}
+THREADS=${GUNICORN_THREADS:-4}
+exec gunicorn app:app --bind 0.0.0.0:$PORT --workers $WORKERS --worker-class gthread --threads $THREADS --preload